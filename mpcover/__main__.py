@@ -3,9 +3,11 @@
 import argparse
 import configparser
 import logging
+import sys
 
 from .config import get_config
 from .gui import init
+from .profiling import Profiler, print_report
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -54,6 +56,52 @@ def parse_arguments(config: configparser.ConfigParser) -> argparse.Namespace:
         help="password for auth with the MPD server",
     )
 
+    parser.add_argument(
+        "--single-connection",
+        action="store_true",
+        default=config.getboolean("connection", "single_connection"),
+        help="use one connection to the MPD server for both commands and monitoring changes",
+    )
+    parser.add_argument(
+        "--no-single-connection",
+        action="store_false",
+        dest="single_connection",
+        # The default is set by `--single-connection`.
+        default=argparse.SUPPRESS,
+        help="use a separate connection for monitoring changes, overrides the config",
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="profile with cProfile from the start, can be toggled with a keybind",
+    )
+
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="trace memory allocations with tracemalloc from the start, can be toggled"
+        " with a keybind",
+    )
+
+    parser.add_argument(
+        "--profile-dir",
+        metavar="DIRECTORY",
+        dest="profile_directory",
+        type=str,
+        default=config.get("other", "profile_directory"),
+        help="directory where profiles and memory snapshots are written",
+    )
+
+    parser.add_argument(
+        "--report",
+        metavar="FILE",
+        type=str,
+        default=None,
+        help="print the top hot spots from a profile or allocation sites from a memory"
+        " snapshot and exit",
+    )
+
     return parser.parse_args()
 
 
@@ -64,8 +112,23 @@ def run():
 
     config = get_config()
     arguments = parse_arguments(config)
+
+    if arguments.report is not None:
+        print_report(arguments.report)
+        sys.exit(0)
+
+    profiler = Profiler(arguments.profile_directory)
+    if arguments.profile:
+        profiler.toggle_profile()
+    if arguments.trace_memory:
+        profiler.toggle_trace_memory()
+
     address = arguments.address, arguments.port
-    init(address, arguments.password)
+    try:
+        init(address, arguments.password, profiler, arguments.single_connection)
+    finally:
+        # Write the results of profiling that is still active on exit.
+        profiler.stop()
 
 
 if __name__ == "__main__":
@@ -4,6 +4,8 @@ import os.path
 __DEFAULTS_CONNECTION = {
     "host": "localhost",
     "port": 6600,
+    "keepalive": 50,
+    "single_connection": "no",
 }
 
 __DEFAULTS_LOGGING = {
@@ -17,11 +19,21 @@ __DEFAULTS_STYLE = {
 
 __DEFAULTS_BINDS = {
     "refresh": "r",
+    "reload": "R",
     "quit": "q",
+    "memory": "m",
+    "profile": "p",
+    "trace_memory": "t",
 }
 
 __DEFAULTS_OTHER = {
     "image_size": "512",
+    "memory_budget": "0",
+    "art_cache_size": "4",
+    "negative_cache_ttl": "300",
+    "response_cache": "yes",
+    "progressive": "no",
+    "profile_directory": ".",
 }
 
 __CONFIG = None
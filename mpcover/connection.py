@@ -1,4 +1,5 @@
 import logging
+import select
 import socket
 import sys
 from typing import List, Optional, Tuple
@@ -25,6 +26,8 @@ class Connection:
 
         # Initialize a variable for the socket.
         self.__sock: socket.socket
+        # Data recieved after the last line read with `readline`.
+        self.__buffer: bytes = b""
 
         # Get info about the provided address/port.
         address_info: List[Tuple] = socket.getaddrinfo(
@@ -126,22 +129,75 @@ class Connection:
         :return: Recieved bytes.
         """
 
-        recv_data = "".encode()
+        # Start with data left over from `readline`.
+        recv_data, self.__buffer = self.__buffer, b""
 
         # Recieve data in chunks.
-        while True:
+        # Responses to command lists have a `list_OK` after each command, only
+        # the final `OK` ends them.
+        while not (
+            (recv_data.endswith(b"OK\n") and not recv_data.endswith(b"list_OK\n"))
+            or recv_data.startswith(b"OK MPD ")
+            or self.__ends_with_error(recv_data)
+        ):
             # Get chunk.
             recv_datum = self.__sock.recv(self.CHUNK_SIZE)
             # Append chunk.
             recv_data += recv_datum
 
-            # Don't exit until all data has been recieved.
+            # Don't exit until all data has been recieved, unless the
+            # connection was closed.
             # Match for version output on connection established.
-            if (
-                recv_data.endswith(b"OK\n")
-                or recv_data.startswith(b"OK MPD ")
-                or len(recv_data) == 0
-            ):
+            if len(recv_datum) == 0:
                 break
 
         return recv_data
+
+    @staticmethod
+    def __ends_with_error(recv_data: bytes) -> bool:
+        """
+        Check if recieved data ends with an error item, which ends a response
+        just like `OK` does.
+
+        :arg recv_data: Recieved data.
+
+        :return: Whether the last line is a complete error item.
+        """
+
+        if not recv_data.endswith(b"\n"):
+            return False
+
+        last_line_start = recv_data.rfind(b"\n", 0, len(recv_data) - 1) + 1
+        return recv_data.startswith(b"ACK [", last_line_start)
+
+    def readable(self) -> bool:
+        """
+        Check if data from MPD can be read without blocking.
+
+        :return: Whether recieved data is waiting to be read.
+        """
+
+        if len(self.__buffer) > 0:
+            return True
+
+        readable, _, _ = select.select([self.__sock], [], [], 0)
+        return len(readable) > 0
+
+    def readline(self) -> bytes:
+        """
+        Recieve a single line from MPD. Reads from the socket in chunks, so
+        memory use doesn't depend on the size of the whole response.
+
+        :return: Recieved line without the trailing newline. Empty if the
+            connection was closed.
+        """
+
+        while b"\n" not in self.__buffer:
+            recv_datum = self.__sock.recv(self.CHUNK_SIZE)
+            if len(recv_datum) == 0:
+                line, self.__buffer = self.__buffer, b""
+                return line
+            self.__buffer += recv_datum
+
+        line, _, self.__buffer = self.__buffer.partition(b"\n")
+        return line
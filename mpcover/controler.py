@@ -3,8 +3,10 @@ from __future__ import annotations
 import logging
 import re
 import sys
+import time
+from contextlib import contextmanager
 from multiprocessing import Queue
-from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from .connection import Connection
 
@@ -14,7 +16,7 @@ logger = logging.getLogger(__name__)
 def generic_command(method: Callable) -> Callable:
     """
     Decorator for generic command methods. Uses the method name as the
-        command.
+        command. Responses go through the response cache, if enabled.
 
     :arg method: The method being decorated.
 
@@ -22,7 +24,21 @@ def generic_command(method: Callable) -> Callable:
         output.
     """
 
-    return lambda self: self.parse_items(list(self.run(method.__code__.co_name)))
+    return lambda self: self.query(method.__code__.co_name)
+
+
+def streaming_command(method: Callable) -> Callable:
+    """
+    Decorator for streaming command methods. Uses the method name as the
+        command.
+
+    :arg method: The method being decorated.
+
+    :return: Lambda function for running the command with the provided
+        arguments and streaming its response.
+    """
+
+    return lambda self, *args: self.stream(method.__code__.co_name, *args)
 
 
 class Controler:
@@ -33,6 +49,23 @@ class Controler:
     :var connection: Connection to the MPD server.
     :var mpd_version: Version of the MPD server, recieved on connection open
         from the server.
+    :var last_activity: Monotonic time of the last response from the server.
+    :var healthy: Whether the last command got a response from the server.
+    :var error: Code of the `ACK` error the last command failed with, `None`
+        if it didn't fail with an error.
+    :var missing: Whether the last `albumart` or `readpicture` found that
+        there is no data, as opposed to failing to recieve it.
+    :var cache: Parsed responses of generic commands, if caching is enabled.
+    :var caching: Whether the response cache is enabled.
+    :var cache_hits: Number of generic commands answered from the cache.
+    :var cache_misses: Number of generic commands sent to the server while
+        caching is enabled.
+    :var idle_subsystems: Subsystems monitored with `idle_start`, `None` if
+        not monitoring subsystems on this connection.
+    :var idling: Whether an `idle` command is waiting for a response.
+    :var pending_changes: Changed subsystems not yet returned by `idle_poll`.
+    :var paused: Depth of `paused` blocks, idle isn't entered again while
+        greater then zero.
     """
 
     # Item regex. Group 1 is the key and group 2 is the value.
@@ -40,15 +73,49 @@ class Controler:
     # Regex patterns for primitive data types. Used when parsing response items.
     RE_INTEGER = re.compile("^[0-9]+$")
     RE_FLOATING = re.compile("^[0-9.]+$")
-
-    def __init__(self, connection: Connection, password: Optional[str] = None):
+    # Error code MPD responds with when the requested object doesn't exist.
+    ERROR_NO_EXIST = 50
+    # Keys that start a new record in responses with multiple records.
+    RECORD_KEYS = ("file", "directory", "playlist")
+    # Cached generic commands whose responses change with each subsystem
+    # reported by `idle`.
+    CACHE_INVALIDATED_BY = {
+        "database": ("stats", "currentsong"),
+        "update": ("status", "stats"),
+        "playlist": ("status", "currentsong"),
+        "player": ("status", "currentsong"),
+        "mixer": ("status",),
+        "options": ("status",),
+        "partition": ("status", "currentsong"),
+    }
+
+    def __init__(self, connection: Connection, password: Optional[str] = None, cache: bool = False):
         self.__connection = connection
         self.__password = password
 
+        # Response cache. Has to be invalidated with the subsystems reported
+        # by `idle` through `invalidate`, otherwise responses never change.
+        self.__cache: Optional[Dict[str, Dict[str, Union[str, int, float, bytes]]]] = (
+            {} if cache else None
+        )
+        self.__cache_hits: int = 0
+        self.__cache_misses: int = 0
+
+        # Single connection mode, see `idle_start`.
+        self.__idle_subsystems: Optional[Tuple[str, ...]] = None
+        self.__idling: bool = False
+        self.__pending_changes: List[str] = []
+        self.__paused: int = 0
+
         self.__mpd_version = self.__connection.recv()[7:-1].decode()
         logging.info("MPD %s", self.__mpd_version)
         self.__auth()
 
+        self.__last_activity: float = time.monotonic()
+        self.__healthy: bool = True
+        self.__error: Optional[int] = None
+        self.__missing: bool = False
+
     def __del__(self):
         """Destructor, closes connection to MPD server."""
 
@@ -62,7 +129,7 @@ class Controler:
         """
 
         if self.__password is not None:
-            self.__connection.send(f'password "{self.__password}"'.encode())
+            self.__connection.send(self.__encode_command("password", self.__password))
             response = self.__connection.recv().decode()
             if response != "OK\n":
                 logger.critical("Failed to authenticate with message: %s", response[:-1])
@@ -73,16 +140,164 @@ class Controler:
         else:
             logger.info("No password provided, assuming successful connection.")
 
-    def run(self, command: str, *args: str) -> Iterable[bytes]:
+    def __reconnect(self):
         """
-        Encode and send a command to the MPD server, then deocde and yeild
-        the response.
+        Open a new connection to the same address and authenticate again.
+        """
+
+        timeout = self.__connection.timeout
+        self.__connection = Connection(self.__connection.host, self.__connection.port)
+        # Flush MPD version output.
+        self.__connection.recv()
+        # Authenticate.
+        self.__auth()
+        # Keep the timeout of the old connection, removed when idling.
+        self.__connection.timeout = timeout
+
+        # Changes might have been missed while disconnected.
+        self.invalidate()
+        if self.__idle_subsystems is not None:
+            self.__idling = False
+            self.__pending_changes += self.__idle_subsystems
+
+    @property
+    def last_activity(self) -> float:
+        return self.__last_activity
+
+    @property
+    def healthy(self) -> bool:
+        return self.__healthy
+
+    @property
+    def error(self) -> Optional[int]:
+        return self.__error
+
+    @property
+    def missing(self) -> bool:
+        return self.__missing
+
+    @property
+    def caching(self) -> bool:
+        return self.__cache is not None
+
+    @property
+    def cache_hits(self) -> int:
+        return self.__cache_hits
+
+    @property
+    def cache_misses(self) -> int:
+        return self.__cache_misses
+
+    def query(self, command: str) -> Dict[str, Union[str, int, float, bytes]]:
+        """
+        Run a read-only command without arguments and parse its response.
+        Answered from the response cache if enabled and the response hasn't
+        been invalidated since it was cached.
+
+        Cached `status` responses keep the `elapsed` and `time` items from
+        when they were cached, since progress isn't reported by `idle`.
+
+        :arg command: Command string.
+
+        :return: A dictionary with parsed items.
+        """
+
+        if self.__cache is None:
+            return self.parse_items(list(self.run(command)))
+
+        # In single connection mode, changes might be waiting on the connection.
+        self.__collect_idle_response()
+
+        cached = self.__cache.get(command)
+        if cached is not None:
+            self.__cache_hits += 1
+            return dict(cached)
+
+        self.__cache_misses += 1
+        result = self.parse_items(list(self.run(command)))
+        # Don't cache failures.
+        if self.__healthy:
+            self.__cache[command] = dict(result)
+
+        return result
+
+    def query_list(self, *commands: str) -> List[Dict[str, Union[str, int, float, bytes]]]:
+        """
+        Run read-only commands without arguments in a single command list, so
+        they cost one round trip. Commands are answered from the response
+        cache like with `query`, only the rest are sent.
+
+        :arg *commands: Command strings.
+
+        :return: A dictionary with parsed items for each command, in order.
+            Empty for commands that weren't run because of an error.
+        """
+
+        results: Dict[str, Dict[str, Union[str, int, float, bytes]]] = {}
+        if self.__cache is not None:
+            # In single connection mode, changes might be waiting on the connection.
+            self.__collect_idle_response()
+            for command in commands:
+                cached = self.__cache.get(command)
+                if cached is not None:
+                    self.__cache_hits += 1
+                    results[command] = dict(cached)
+
+        missing = [command for command in commands if command not in results]
+        if missing:
+            data = b"\n".join(
+                [
+                    b"command_list_ok_begin",
+                    *[self.__encode_command(command) for command in missing],
+                    b"command_list_end",
+                ]
+            )
+
+            # Responses are separated by `list_OK` items.
+            responses: List[List[bytes]] = [[]]
+            for item in self.__run_encoded(data):
+                if item == b"list_OK":
+                    responses.append([])
+                else:
+                    responses[-1].append(item)
+
+            # The last response is only complete if it was followed by `list_OK`.
+            for command, items in zip(missing, responses[:-1]):
+                results[command] = self.parse_items(items)
+                if self.__cache is not None:
+                    self.__cache_misses += 1
+                    self.__cache[command] = dict(results[command])
+
+        return [results.get(command, {}) for command in commands]
+
+    def invalidate(self, *subsystems: str):
+        """
+        Invalidate cached responses affected by changes in subsystems, as
+        reported by `idle`.
+
+        :arg *subsystems: Changed subsystems. Invalidates all cached responses
+            if none are provided.
+        """
+
+        if self.__cache is None:
+            return
+
+        if len(subsystems) == 0:
+            self.__cache.clear()
+            return
+
+        for subsystem in subsystems:
+            for command in self.CACHE_INVALIDATED_BY.get(subsystem, ()):
+                self.__cache.pop(command, None)
+
+    def __encode_command(self, command: str, *args: str) -> bytes:
+        """
+        Encode a command with its arguments.
 
         :arg command: Command string.
         :arg *args: Positional arguments for the command.
 
-        :return: Yeilds bytes. Finished when success or error item is
-            encounterd.
+        :return: Encoded command, without the trailing newline.
         """
 
         # Encode command string.
@@ -94,13 +309,42 @@ class Controler:
             if not isinstance(arg, str):
                 arg = str(arg)
 
-            # If an argument contains space characters, put it in quotes.
-            if " " in arg:
-                arg = '"' + arg + '"'
+            # Escape and quote every argument. MPD rejects unquoted
+            # apostrophes and an empty argument would otherwise be lost.
+            arg = '"' + arg.replace("\\", "\\\\").replace('"', '\\"') + '"'
 
             # Encode and append argument to command.
             data += b" " + arg.encode()
 
+        return data
+
+    def run(self, command: str, *args: str) -> Iterable[bytes]:
+        """
+        Encode and send a command to the MPD server, then deocde and yeild
+        the response.
+
+        :arg command: Command string.
+        :arg *args: Positional arguments for the command.
+
+        :return: Yeilds bytes. Finished when success or error item is
+            encounterd.
+        """
+
+        yield from self.__run_encoded(self.__encode_command(command, *args))
+
+    def __run_encoded(self, data: bytes) -> Iterable[bytes]:
+        """
+        Send encoded commands to the MPD server, reconnecting if there is no
+        response, then deocde and yeild the response.
+
+        :arg data: Encoded command or command list.
+
+        :return: Yeilds bytes. Finished when success or error item is
+            encounterd.
+        """
+
+        self.__error = None
+
         attempts = 0
 
         # Set default value of respnse to an empty string,
@@ -110,7 +354,7 @@ class Controler:
         while attempts < 3:
             try:
                 # Send command to MPD.
-                self.__connection.send(data)
+                self.__send(data)
                 # Gather response.
                 response = self.__connection.recv()
             except BrokenPipeError as error:
@@ -122,18 +366,89 @@ class Controler:
             if len(response) == 0:
                 logger.debug("Got no response, attempting to reconnect.")
                 attempts += 1
-                # Reconnect.
-                self.__connection = Connection(self.__connection.host, self.__connection.port)
-                # Flush MPD version output.
-                self.__connection.recv()
-                # Authenticate.
-                self.__auth()
+                self.__reconnect()
                 continue
 
             break
 
+        self.__healthy = len(response) > 0
+        if self.__healthy:
+            self.__last_activity = time.monotonic()
+
+        self.__send_idle()
+
         yield from self.__parse_response(response)
 
+    def stream(
+        self, command: str, *args: str
+    ) -> Iterator[Dict[str, Union[str, int, float, bytes]]]:
+        """
+        Encode and send a command to the MPD server, then yield records from
+        the response as they are recieved. Unlike `run`, the response is never
+        held in memory as a whole, so it's suitable for huge responses.
+
+        Responses are split into records on `file`, `directory` and `playlist`
+        items, so items from different songs don't overwrite each other.
+
+        :arg command: Command string.
+        :arg *args: Positional arguments for the command.
+
+        :return: Yields parsed records. Finished when success or error item
+            is encountered.
+        """
+
+        data = self.__encode_command(command, *args)
+        self.__error = None
+
+        try:
+            self.__send(data)
+        except OSError as error:
+            logger.error(error)
+            logger.debug("Failed to send, attempting to reconnect.")
+            self.__reconnect()
+            self.__send(data)
+
+        record: Dict[str, Union[str, int, float, bytes]] = {}
+        finished = False
+        try:
+            while True:
+                line = self.__connection.readline()
+                self.__last_activity = time.monotonic()
+
+                # Last item, command success.
+                if line == b"OK":
+                    break
+
+                # Last item, command error.
+                if line[:3] == b"ACK":
+                    self.__handle_error(line)
+                    break
+
+                # Connection closed.
+                if len(line) == 0:
+                    logger.error("Connection closed while streaming %r.", command)
+                    break
+
+                key, value = self.__parse_item(line)
+                if key in self.RECORD_KEYS and record:
+                    yield record
+                    record = {}
+                record[key] = value
+
+            finished = True
+        except OSError as error:
+            logger.error(error)
+        finally:
+            # The rest of the response is still on its way if streaming was
+            # stopped early, start over with a new connection.
+            if not finished:
+                logger.debug("Streaming %r stopped early, reconnecting.", command)
+                self.__reconnect()
+            self.__send_idle()
+
+        if record:
+            yield record
+
     def __parse_item(self, item: bytes) -> Tuple[str, Union[str, int, float, bytes]]:
         """
         Generic parser for single items from a response.
@@ -160,6 +475,28 @@ class Controler:
 
         return match.group(1), value
 
+    def __handle_error(self, item: bytes):
+        """
+        Handle an error item from a response. Exits if the error is caused by
+        missing authentication, otherwise logs the error.
+
+        :arg item: Error item, starting with `ACK`.
+        """
+
+        # Items look like `ACK [50@0] {albumart} No file exists`.
+        try:
+            self.__error = int(item[item.index(b"[") + 1 : item.index(b"@")])
+        except ValueError:
+            self.__error = None
+
+        if b"you don't have permission for" in item:
+            # No password provided but auth required.
+            logger.critical(item[3:].decode())
+            sys.exit(202)
+        else:
+            # Log error.
+            logger.error(item[3:].decode())
+
     def parse_items(self, items: List[bytes]) -> Dict[str, Union[str, int, float, bytes]]:
         """
         Generic response item parser.
@@ -200,14 +537,8 @@ class Controler:
 
                 # Last item, command error.
                 if item[:3] == b"ACK":
-                    if b"you don't have permission for" in item:
-                        # No password provided but auth required.
-                        logger.critical(item[3:].decode())
-                        sys.exit(202)
-                    else:
-                        # Log error and return.
-                        logger.error(item[3:].decode())
-                        return
+                    self.__handle_error(item)
+                    return
 
                 # Handle binary items.
                 if item[:8] == b"binary: ":
@@ -265,6 +596,33 @@ class Controler:
         :return: Dictionary with information about the currently active song (`Dict[str, Union[str, int]]`).
         """
 
+    @streaming_command
+    def listallinfo(self):
+        """
+        Get info about all songs and directories in the database, or in a
+        directory if a path is provided.
+
+        :return: Yields dictionaries, one per song or directory.
+        """
+
+    @streaming_command
+    def playlistinfo(self):
+        """
+        Get info about songs in the queue. A song position or a range can be
+        provided.
+
+        :return: Yields dictionaries, one per song.
+        """
+
+    @streaming_command
+    def find(self):
+        """
+        Find songs in the database matching a filter expression, or tag and
+        value pairs, provided as arguments.
+
+        :return: Yields dictionaries, one per song.
+        """
+
     def albumart(self, path: Optional[str] = None) -> Optional[bytes]:
         """
         Get album art. MPD looks for a `cover.[png|jpg|tiff|bmp]` file.
@@ -275,6 +633,84 @@ class Controler:
         :return: Album art as bytes or `None` if album art does not exist.
         """
 
+        return self.__join_chunks(self.albumart_chunks(path))
+
+    def albumart_chunks(self, path: Optional[str] = None) -> Iterator[Tuple[bytes, int]]:
+        """
+        Get album art chunk by chunk, as the chunks are recieved from MPD.
+
+        :arg path: Path to an audio file or album directory. If none is
+            specified, album art for the current song will be returned.
+
+        :return: Yields tuples of a chunk of album art and the total size of
+            the album art. Stops early if album art does not exist or an
+            error occurs.
+        """
+
+        return self.__binary_chunks("albumart", path)
+
+    def readpicture(self, path: Optional[str] = None) -> Optional[bytes]:
+        """
+        Get a picture embedded in an audio file, usually the album art.
+
+        :arg path: Path to an audio file. If none is specified, the picture
+            embedded in the current song will be returned.
+
+        :return: Picture as bytes or `None` if the file has no picture.
+        """
+
+        return self.__join_chunks(self.readpicture_chunks(path))
+
+    def readpicture_chunks(self, path: Optional[str] = None) -> Iterator[Tuple[bytes, int]]:
+        """
+        Get a picture embedded in an audio file chunk by chunk, as the chunks
+        are recieved from MPD.
+
+        :arg path: Path to an audio file. If none is specified, the picture
+            embedded in the current song will be returned.
+
+        :return: Yields tuples of a chunk of the picture and the total size of
+            the picture. Stops early if the file has no picture or an error
+            occurs.
+        """
+
+        return self.__binary_chunks("readpicture", path)
+
+    def __join_chunks(self, chunks: Iterator[Tuple[bytes, int]]) -> Optional[bytes]:
+        """
+        Join chunks of a binary response.
+
+        :arg chunks: Chunks and total sizes, from `__binary_chunks`.
+
+        :return: Joined chunks or `None` if not all chunks were recieved.
+        """
+
+        result: bytes = b""
+        size: int = -1
+
+        for chunk, size in chunks:
+            # Append new binary data to result.
+            result += chunk
+
+        # An error occured before all of the data was recieved.
+        if len(result) != size:
+            return None
+
+        return result
+
+    def __binary_chunks(self, command: str, path: Optional[str]) -> Iterator[Tuple[bytes, int]]:
+        """
+        Run a command that returns binary data in chunks, like `albumart` and
+        `readpicture`, with an increasing offset until all data is recieved.
+
+        :arg command: Command string.
+        :arg path: Path to an audio file or album directory. If none is
+            specified, the path of the current song is used.
+
+        :return: Yields tuples of a chunk and the total size of the data.
+            Stops early if there is no data or an error occurs.
+        """
+
         # Get current song path if no path was provided.
         real_path: str
         if path is None:
@@ -282,19 +718,23 @@ class Controler:
         else:
             real_path = path
 
-        # Initliaize offset counter, total size and result buffer.
+        # Initliaize offset counter and total size.
         offset: int = 0
         size: int = 1
-        result: bytes = b""
+        self.__missing = False
 
         # Load chunks until offset reaches end of file.
         while offset < size:
             # Run command with offset.
-            items = list(self.run("albumart", real_path, str(offset)))
-            # If length of items is 0, an error occured. Requested album art
-            # probably does not exist.
+            items = list(self.run(command, real_path, str(offset)))
+            # If length of items is 0, an error occured or there is no data.
+            # It only definitely doesn't exist if MPD said so before any data
+            # was recieved, `readpicture` responds with no items in that case.
             if len(items) == 0:
-                return None
+                self.__missing = (
+                    offset == 0 and self.__healthy and self.__error in (None, self.ERROR_NO_EXIST)
+                )
+                return
 
             # Parse items.
             items = self.parse_items(items)
@@ -308,20 +748,183 @@ class Controler:
             # Update size again since it's probably faster then an if
             # statement and MPD always returns the same size.
             size = items_size
-            # Append new binary data to result.
-            result += items_binary_data
 
-        return result
+            yield items_binary_data, size
+
+    def ping(self) -> bool:
+        """
+        Send a `ping` to keep the connection from timing out. Reconnects if the
+        server doesn't respond.
+
+        :return: Whether the server responded.
+        """
+
+        # A successful ping has no items in the response.
+        list(self.run("ping"))
+        return self.__healthy
+
+    def keepalive(self, interval: float) -> float:
+        """
+        Ping the server if the connection has been unused for `interval`
+        seconds. Should be called periodically, with an interval shorter then
+        the `connection_timeout` of the server.
+
+        :arg interval: Longest time in seconds the connection can be unused.
+
+        :return: Seconds until the connection should be checked again.
+        """
+
+        # The server doesn't time out connections waiting for `idle` to respond.
+        if self.__idling:
+            return interval
+
+        if time.monotonic() - self.__last_activity >= interval:
+            logger.debug("Connection unused for %.0f seconds, sending ping.", interval)
+            if not self.ping():
+                logger.warning("Keepalive ping failed.")
+
+        return max(self.__last_activity + interval - time.monotonic(), 0)
+
+    def __send(self, data: bytes):
+        """
+        Send an encoded command. In single connection mode, leaves idle first
+        by sending `noidle` in the same write as the command and reading the
+        response to `idle` before the response to the command.
+
+        :arg data: Encoded command.
+        """
+
+        if not self.__idling:
+            self.__connection.send(data)
+            return
+
+        self.__connection.send(b"noidle\n" + data)
+        self.__idling = False
+        changed = self.__read_idle_response()
+        self.__pending_changes += changed
+        self.invalidate(*changed)
+
+    def __send_idle(self):
+        """
+        Enter idle again in single connection mode, unless already idling or
+        paused.
+        """
+
+        if self.__idle_subsystems is None or self.__idling or self.__paused > 0:
+            return
+
+        try:
+            self.__connection.send(self.__encode_command("idle", *self.__idle_subsystems))
+            self.__idling = True
+        except OSError as error:
+            # Entered again with the next command, after reconnecting.
+            logger.error(error)
+
+    def __read_idle_response(self) -> List[str]:
+        """
+        Read a response to `idle`.
+
+        :raises ConnectionError: If the connection was closed.
+
+        :return: Changed subsystems.
+        """
+
+        changed: List[str] = []
+        while True:
+            line = self.__connection.readline()
+
+            if len(line) == 0:
+                raise ConnectionError("Connection closed while idling.")
+
+            # Last item, command success.
+            if line == b"OK":
+                break
+
+            # Last item, command error.
+            if line[:3] == b"ACK":
+                self.__handle_error(line)
+                break
+
+            key, value = self.__parse_item(line)
+            if key == "changed":
+                changed.append(str(value))
+
+        return changed
+
+    def idle_start(self, *subsystems: str):
+        """
+        Start monitoring subsystems on this connection without blocking, for
+        single connection mode. Changes are collected with `idle_poll`.
+
+        Other commands can still be run, `noidle` is sent together with them
+        and idle is entered again once they're done. Use `paused` to run
+        several commands before entering idle again.
+
+        :arg *subsystems: Subsystems to monitor, all if none are provided.
+        """
+
+        self.__idle_subsystems = subsystems
+        self.__send_idle()
+
+    def idle_poll(self) -> List[str]:
+        """
+        Collect changes detected since the last poll. Doesn't block if there
+        are none.
+
+        :return: Changed subsystems.
+        """
+
+        self.__collect_idle_response()
+
+        changed, self.__pending_changes = self.__pending_changes, []
+        return changed
+
+    def __collect_idle_response(self):
+        """
+        Read the response to `idle` if it was recieved, without blocking, and
+        enter idle again. Invalidates cached responses affected by the changes.
+        """
+
+        if not (self.__idling and self.__connection.readable()):
+            return
+
+        self.__idling = False
+        try:
+            changed = self.__read_idle_response()
+            self.__pending_changes += changed
+            self.invalidate(*changed)
+        except OSError as error:
+            logger.error(error)
+            self.__reconnect()
+
+        self.__last_activity = time.monotonic()
+        self.__send_idle()
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        """
+        Context manager for running several commands in single connection
+        mode. Idle is left with the first command and entered again only
+        once the block exits.
+        """
+
+        self.__paused += 1
+        try:
+            yield
+        finally:
+            self.__paused -= 1
+            self.__send_idle()
 
     def idle(self, queue: Queue, *subsystems: str):
         """
         Removes the connection timeout and runs an `idle` command to monitor
-        specified subsystems. Put the detected change on the provided queue.
-        Blocking, never exits.
+        specified subsystems. Put the list of changed subsystems on the
+        provided queue. Blocking, never exits.
         """
 
         self.__connection.timeout = None
         while True:
-            result = self.parse_items(list(self.run("idle", *subsystems)))
-            logger.debug("Subsystem change detected, puting on queue.")
-            queue.put(result["changed"])
+            items = [self.__parse_item(item) for item in self.run("idle", *subsystems)]
+            changed = [value for key, value in items if key == "changed"]
+            logger.debug("Subsystem change detected, puting on queue: %r.", changed)
+            queue.put(changed)
@@ -1,15 +1,24 @@
 from typing import Optional, Tuple
 
+from ..profiling import Profiler
 from .root import Root
 
 
-def init(address: Tuple[str, int], password: Optional[str]):
+def init(
+    address: Tuple[str, int],
+    password: Optional[str],
+    profiler: Profiler,
+    single_connection: bool = False,
+):
     """
     Initialize the GUI.
 
     :arg address: IP address and port for MPD.
     :arg password: Password for auth with the MPD server.
+    :arg profiler: Profiler toggled with keybinds.
+    :arg single_connection: Use a single connection to MPD, without a
+        separate process for monitoring player changes.
     """
 
-    root = Root(address, password)
+    root = Root(address, password, profiler, single_connection)
     root.mainloop()
@@ -0,0 +1,382 @@
+import io
+import threading
+import time
+from collections import OrderedDict
+from logging import getLogger
+from typing import Dict, Hashable, List, Optional
+
+from PIL import Image, ImageFile
+
+from .memory import PHOTO_IMAGE_BANDS, MemoryBudget
+
+logger = getLogger(__name__)
+
+
+def fit_album_art(image: Image.Image, image_size: int, budget: MemoryBudget) -> Image.Image:
+    """
+    Resizes decoded album art if it's larger then the configured image size
+    or if it doesn't fit in the memory budget.
+
+    :arg image: Decoded album art.
+    :arg image_size: Configured size of the album art.
+    :arg budget: Memory budget the album art is accounted in.
+
+    :return: Album art that fits, always a new image.
+    """
+
+    # Pyramid levels take up to a third more memory than the original.
+    # Leave room for them and a photo image of the same size. Cached album
+    # art is evicted to make room if needed.
+    size = image_size
+    fit = budget.fit_square(len(image.getbands()) * 4 / 3 + PHOTO_IMAGE_BANDS, exclude="cache")
+    if fit is not None and fit < size:
+        logger.debug("Album art limited to %dx%d by the memory budget.", fit, fit)
+        size = fit
+
+    # Palette and other modes can't be downscaled smoothly.
+    if image.mode not in ("L", "RGB", "RGBA"):
+        image = image.convert("RGB")
+
+    # Resize if image is large. Otherwise copy it, so the encoded data can be
+    # released together with the opened image.
+    if max(image.size) > size:
+        return image.resize((size, size))
+    return image.copy()
+
+
+class Pyramid:
+    """
+    Album art with precomputed downscaled levels. Each level is half the size
+    of the previous one, so displaying the art at any size only needs a small
+    final resample from the nearest larger level.
+
+    :arg image: Original album art, the first level of the pyramid.
+
+    :var levels: Levels from the largest to the smallest. Only contains the
+        original image until the pyramid is built.
+    :var size: Memory used by all levels once the pyramid is built.
+    """
+
+    # Levels smaller then this are not worth keeping.
+    MIN_SIZE = 32
+
+    def __init__(self, image: Image.Image):
+        self.__levels: List[Image.Image] = [image]
+        self.__thread: Optional[threading.Thread] = None
+
+        # Calculate the size up front, so it can be accounted for before
+        # the levels exist.
+        bands = len(image.getbands())
+        width, height = image.size
+        self.size: int = 0
+        while True:
+            self.size += width * height * bands
+            if min(width, height) // 2 < self.MIN_SIZE:
+                break
+            width, height = (width + 1) // 2, (height + 1) // 2
+
+    @property
+    def original(self) -> Image.Image:
+        return self.__levels[0]
+
+    def build(self):
+        """
+        Build the downscaled levels. Blocking.
+        """
+
+        levels = [self.original]
+        while min(levels[-1].size) // 2 >= self.MIN_SIZE:
+            levels.append(levels[-1].reduce(2))
+
+        self.__levels = levels
+
+    def build_in_background(self):
+        """
+        Build the downscaled levels in a separate thread. Until the pyramid
+        is built, `level` returns the original image.
+        """
+
+        self.__thread = threading.Thread(target=self.build, daemon=True)
+        self.__thread.start()
+
+    def level(self, size: int) -> Image.Image:
+        """
+        Get the smallest level that is at least as large as the given size.
+
+        :arg size: Size the image is going to be resized to.
+
+        :return: Pyramid level, the original image if no smaller level is
+            large enough.
+        """
+
+        levels = self.__levels
+        for level in reversed(levels):
+            if min(level.size) >= size:
+                return level
+        return levels[0]
+
+    def close(self):
+        """
+        Release the pixel buffers of all levels. Waits for a background build
+        to finish first, so that the levels aren't released while in use.
+        """
+
+        if self.__thread is not None:
+            self.__thread.join()
+        for level in self.__levels:
+            level.close()
+
+
+class ArtCache:
+    """
+    Least recently used cache of album art pyramids. Accounts for its size in
+    the memory budget and evicts old entries to stay within it.
+
+    :arg budget: Memory budget the cache is accounted in.
+    :arg max_entries: Maximum number of cached pyramids, at least one.
+
+    :var entries: Cached pyramids, from least to most recently used.
+    """
+
+    def __init__(self, budget: MemoryBudget, max_entries: int):
+        self.__budget = budget
+        self.__max_entries = max(max_entries, 1)
+        self.__entries: "OrderedDict[Hashable, Pyramid]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key: Hashable) -> Optional[Pyramid]:
+        """
+        Get a cached pyramid and mark it as most recently used.
+
+        :arg key: Identity of the album art.
+
+        :return: Cached pyramid or `None` if it's not cached.
+        """
+
+        pyramid = self.__entries.get(key)
+        if pyramid is not None:
+            self.__entries.move_to_end(key)
+        return pyramid
+
+    def put(self, key: Hashable, pyramid: Pyramid):
+        """
+        Add a pyramid to the cache. Evicts least recently used pyramids if
+        there are too many or if they don't fit in the memory budget. The
+        added pyramid is never evicted.
+
+        :arg key: Identity of the album art.
+        :arg pyramid: Album art pyramid.
+        """
+
+        previous = self.__entries.pop(key, None)
+        if previous is not None and previous is not pyramid:
+            previous.close()
+        self.__entries[key] = pyramid
+        self.__account()
+
+        while len(self.__entries) > 1 and (
+            len(self.__entries) > self.__max_entries or self.__budget.exceeded
+        ):
+            evicted_key, evicted = self.__entries.popitem(last=False)
+            logger.debug("Evicting album art %r from the cache.", evicted_key)
+            evicted.close()
+            self.__account()
+
+    def clear(self):
+        """
+        Remove and release all cached pyramids.
+        """
+
+        while self.__entries:
+            _, pyramid = self.__entries.popitem()
+            pyramid.close()
+        self.__account()
+
+    def __account(self):
+        """
+        Update the size of the cache in the memory budget.
+        """
+
+        self.__budget.set("cache", sum(pyramid.size for pyramid in self.__entries.values()))
+
+
+class NegativeCache:
+    """
+    Remembers album art lookups that found nothing, so they aren't repeated
+    on every player change or refresh. Entries expire after `ttl` seconds, in
+    case album art is added later.
+
+    :arg ttl: Time to live for entries in seconds.
+
+    :var expiry: Monotonic expiry time for each entry.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.__expiry: Dict[Hashable, float] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        expiry = self.__expiry.get(key)
+        if expiry is None:
+            return False
+
+        if expiry <= time.monotonic():
+            del self.__expiry[key]
+            return False
+
+        return True
+
+    def add(self, key: Hashable):
+        """
+        Remember that there is no album art for a key.
+
+        :arg key: Identity of the album art.
+        """
+
+        now = time.monotonic()
+
+        # Drop expired entries so the cache doesn't grow forever.
+        for expired in [entry for entry, expiry in self.__expiry.items() if expiry <= now]:
+            del self.__expiry[expired]
+
+        self.__expiry[key] = now + self.ttl
+
+    def clear(self):
+        """
+        Forget all entries.
+        """
+
+        self.__expiry.clear()
+
+
+class ProgressiveDecoder:
+    """
+    Decodes album art while it's being downloaded and provides previews of
+    the part recieved so far. Only one copy of the encoded data is kept.
+
+    `ImageFile.Parser` decodes some formats (BMP, GIF) incrementally, those
+    are handed over to the parser once their header is recieved. Formats with
+    custom load code (JPEG, PNG) are only decoded by the parser once complete,
+    so those are just buffered and previews are decoded from the truncated
+    buffer.
+
+    :var buffer: Encoded data recieved so far, `None` once handed over to the
+        parser.
+    :var parser: Incremental parser, `None` unless the format can be decoded
+        incrementally.
+    :var identified: Whether the header was recieved and the format is known.
+    """
+
+    def __init__(self):
+        self.__buffer: Optional[io.BytesIO] = io.BytesIO()
+        self.__parser: Optional[ImageFile.Parser] = None
+        self.__identified: bool = False
+
+    @property
+    def size(self) -> int:
+        """
+        Size of the encoded data currently held, in bytes.
+        """
+
+        if self.__buffer is not None:
+            return self.__buffer.seek(0, io.SEEK_END)
+        if self.__parser is not None and self.__parser.data is not None:
+            return len(self.__parser.data)
+        return 0
+
+    def feed(self, chunk: bytes):
+        """
+        Feed a chunk of the encoded album art to the decoder.
+
+        :arg chunk: Next chunk of the album art.
+        """
+
+        if self.__parser is not None:
+            self.__parser.feed(chunk)
+            return
+
+        self.__buffer.seek(0, io.SEEK_END)
+        self.__buffer.write(chunk)
+        if not self.__identified:
+            self.__identify()
+
+    def __identify(self):
+        """
+        Check whether the header was recieved. If so and the format can be
+        decoded incrementally, hand the buffered data over to a parser.
+        """
+
+        self.__buffer.seek(0)
+        try:
+            with Image.open(self.__buffer) as image:
+                # Same check `ImageFile.Parser` does.
+                incremental = len(image.tile) == 1 and not (
+                    hasattr(image, "load_seek") or hasattr(image, "load_read")
+                )
+        except (OSError, SyntaxError, ValueError):
+            return  # Not enough data yet.
+
+        self.__identified = True
+        if incremental:
+            self.__parser = ImageFile.Parser()
+            self.__parser.feed(self.__buffer.getvalue())
+            self.__buffer = None
+
+    def preview(self, size: int) -> Optional[Image.Image]:
+        """
+        Get a preview of the album art decoded so far.
+
+        :arg size: Size of the preview.
+
+        :return: Preview image or `None` if not enough data was recieved yet.
+        """
+
+        if not self.__identified:
+            return None
+
+        # Rows that haven't been recieved yet are blank.
+        if self.__parser is not None:
+            if self.__parser.image is None:
+                return None
+            return self.__parser.image.resize((size, size), reducing_gap=2.0)
+
+        truncated = ImageFile.LOAD_TRUNCATED_IMAGES
+        ImageFile.LOAD_TRUNCATED_IMAGES = True
+        try:
+            self.__buffer.seek(0)
+            with Image.open(self.__buffer) as partial:
+                # Only decodes at the scale needed, for JPEGs.
+                partial.draft("RGB", (size, size))
+                return partial.resize((size, size), reducing_gap=2.0)
+        except (OSError, SyntaxError, ValueError) as error:
+            logger.debug("No preview yet: %r.", error)
+            return None
+        finally:
+            ImageFile.LOAD_TRUNCATED_IMAGES = truncated
+
+    def close(self) -> Optional[Image.Image]:
+        """
+        Finish decoding once all of the album art was fed to the decoder.
+        Releases the encoded data.
+
+        :return: Decoded album art or `None` if it's incomplete or invalid.
+        """
+
+        parser, buffer = self.__parser, self.__buffer
+        self.__parser = self.__buffer = None
+        try:
+            if parser is not None:
+                return parser.close()
+
+            buffer.seek(0)
+            image = Image.open(buffer)
+            image.load()
+            return image
+        except (OSError, SyntaxError, ValueError) as error:
+            logger.error("Failed to decode album art: %r.", error)
+            return None
+        finally:
+            if buffer is not None:
+                buffer.close()
@@ -0,0 +1,141 @@
+import math
+from logging import getLogger
+from typing import Dict, Optional
+
+from PIL import Image
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None  # type: ignore
+
+logger = getLogger(__name__)
+
+# Tk photo images store every pixel as 4 bytes (RGBA), regardless of the
+# mode of the Pillow image they were created from.
+PHOTO_IMAGE_BANDS = 4
+
+
+def image_bytes(image: Image.Image) -> int:
+    """
+    Estimate the memory used by the pixel data of a decoded Pillow image.
+
+    :arg image: Pillow image.
+
+    :return: Size in bytes.
+    """
+
+    return image.width * image.height * len(image.getbands())
+
+
+def photo_image_bytes(width: int, height: int) -> int:
+    """
+    Estimate the memory used by a Tk photo image of the given size.
+
+    :arg width: Width of the photo image.
+    :arg height: Height of the photo image.
+
+    :return: Size in bytes.
+    """
+
+    return width * height * PHOTO_IMAGE_BANDS
+
+
+class MemoryBudget:
+    """
+    Keeps track of memory used by decoded images, caches and Tk images and
+    checks it against a configured limit.
+
+    :arg limit: Limit in bytes. Zero or less means that there is no limit.
+
+    :var usage: Tracked size in bytes for each named allocation.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.__usage: Dict[str, int] = {}
+
+    @property
+    def unlimited(self) -> bool:
+        return self.limit <= 0
+
+    @property
+    def total(self) -> int:
+        return sum(self.__usage.values())
+
+    @property
+    def exceeded(self) -> bool:
+        return not self.unlimited and self.total > self.limit
+
+    def set(self, name: str, size: int):
+        """
+        Set the tracked size of an allocation, replacing the previous one.
+
+        :arg name: Name of the allocation.
+        :arg size: Size in bytes.
+        """
+
+        self.__usage[name] = size
+
+    def release(self, name: str):
+        """
+        Stop tracking an allocation.
+
+        :arg name: Name of the allocation.
+        """
+
+        self.__usage.pop(name, None)
+
+    def available(self, exclude: Optional[str] = None) -> Optional[int]:
+        """
+        Get the number of bytes left in the budget.
+
+        :arg exclude: Name of an allocation that should not count as used,
+            for when it's about to be replaced.
+
+        :return: Bytes left or `None` if there is no limit.
+        """
+
+        if self.unlimited:
+            return None
+
+        used = self.total
+        if exclude is not None:
+            used -= self.__usage.get(exclude, 0)
+
+        return max(self.limit - used, 0)
+
+    def fit_square(self, bytes_per_pixel: float, exclude: Optional[str] = None) -> Optional[int]:
+        """
+        Get the side of the largest square image that fits in the budget.
+
+        :arg bytes_per_pixel: Memory used per pixel of the image.
+        :arg exclude: Name of an allocation that is about to be replaced.
+
+        :return: Side length in pixels or `None` if there is no limit.
+        """
+
+        available = self.available(exclude)
+        if available is None:
+            return None
+
+        return max(math.isqrt(int(available / bytes_per_pixel)), 1)
+
+    def report(self) -> str:
+        """
+        Describe the current footprint.
+
+        :return: Human readable report of the tracked allocations, the
+            limit and the peak resident set size of the process (if known).
+        """
+
+        parts = [f"{name}={size / 1024:.0f}KiB" for name, size in sorted(self.__usage.items())]
+        parts.append(f"total={self.total / 1024:.0f}KiB")
+        parts.append("limit=none" if self.unlimited else f"limit={self.limit / 1024:.0f}KiB")
+
+        if resource is not None:
+            # Linux reports kilobytes, macOS reports bytes.
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            parts.append(f"peak_rss={peak}")
+
+        return " ".join(parts)
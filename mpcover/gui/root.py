@@ -1,15 +1,20 @@
 import configparser
 import io
+import posixpath
+import time
 import tkinter as tk
 from logging import getLogger
 from multiprocessing import Process, Queue
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from PIL import Image, ImageTk
 
 from ..config import get_config
 from ..connection import Connection
 from ..controler import Controler
+from ..profiling import Profiler
+from .art import ArtCache, NegativeCache, ProgressiveDecoder, Pyramid, fit_album_art
+from .memory import PHOTO_IMAGE_BANDS, MemoryBudget, photo_image_bytes
 
 logger = getLogger(__name__)
 
@@ -20,6 +25,9 @@ class Root(tk.Tk):
 
     :arg address: A string IP address and an integer port where MPD is running.
     :arg password: Password for auth with the MPD server.
+    :arg profiler: Profiler toggled with keybinds.
+    :arg single_connection: Monitor player changes on the main connection
+        instead of opening a second connection in a separate process.
 
     :var connection: Connection to MPD.
     :var controler: Interface to MPD.
@@ -28,31 +36,71 @@ class Root(tk.Tk):
     :var canvas_width: Width of the canvas. Updated with window resize events.
     :var canvas_height: Height of the canvas. Updated with window resize events.
 
-    :var album_art_original: Album art originally downloaded from MPD, resized
-        to 512x512 if larger then that.
+    :var memory_budget: Tracks memory used by the album art images.
+    :var art_cache: Recently displayed album art, by album art identity.
+    :var cover_misses: Album directories without a cover file.
+    :var picture_misses: Songs without an embedded picture.
+
+    :var album_art_pyramid: Album art originally downloaded from MPD, resized
+        to 512x512 if larger then that or to fit the memory budget, along
+        with its downscaled levels.
     :var album_art: Album art displayed on the canvas.
     :var album_queue: Queue used for communication between the main GUI process
         and the player change monitoring process.
-    :var album: Name of the currently playing album.
+    :var album_art_key: Identity of the displayed album art. The directory
+        for a cover file. The directory and album for an embedded picture, or
+        the song if it has no Album tag.
     :var album_connection: Connection to MPD used for monitoring player changes.
     :var album_controler: Interface to MPD used for monitoring player changes.
     :var album_process: Process that waits for player changes using the `idle`
-        command.
+        command. `None` in single connection mode.
     """
 
-    def __init__(self, address: Tuple[str, int], password: Optional[str]):
+    # Minimum time in seconds between previews of album art that is still
+    # being downloaded.
+    PREVIEW_INTERVAL = 0.25
+    # Subsystems monitored for changes. Only player and playlist changes can
+    # change the album art.
+    IDLE_SUBSYSTEMS = ("player", "playlist")
+    # Additionally monitored with the response cache enabled, to keep cached
+    # responses up to date.
+    CACHE_IDLE_SUBSYSTEMS = ("mixer", "options")
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        password: Optional[str],
+        profiler: Profiler,
+        single_connection: bool = False,
+    ):
         super().__init__()
 
+        self.__profiler: Profiler = profiler
+
         config: configparser.ConfigParser = get_config()
 
-        # Connect to MPD.
+        # Connect to MPD. Responses to `status` and `currentsong` are cached
+        # until the album process reports a change.
         self.__connection: Connection = Connection(*address)
-        self.__controler: Controler = Controler(self.__connection, password)
+        self.__controler: Controler = Controler(
+            self.__connection, password, cache=config.getboolean("other", "response_cache")
+        )
 
         # Read configuration.
         self.__color_background: str = config.get("style", "background")
         self.__padding: int = config.getint("style", "padding")
         self.__image_size: int = config.getint("other", "image_size")
+        self.__keepalive_interval: float = config.getfloat("connection", "keepalive")
+        self.__progressive: bool = config.getboolean("other", "progressive")
+        self.__memory_budget: MemoryBudget = MemoryBudget(
+            config.getint("other", "memory_budget") * 1024
+        )
+        self.__art_cache: ArtCache = ArtCache(
+            self.__memory_budget, config.getint("other", "art_cache_size")
+        )
+        negative_cache_ttl: float = config.getfloat("other", "negative_cache_ttl")
+        self.__cover_misses: NegativeCache = NegativeCache(negative_cache_ttl)
+        self.__picture_misses: NegativeCache = NegativeCache(negative_cache_ttl)
 
         # Configure window.
         self.title("MPCover")
@@ -87,14 +135,21 @@ class Root(tk.Tk):
         # resizing from lowering the quality of the image by always using
         # the original image when resizing instead of the displayed one.
         # Always first resized for better performance with rapid window size changes.
-        self.__album_art_original: Optional[Image.Image] = None
+        # Downscaled levels are built in the background, so resizing the window
+        # only needs a small resample from the nearest level.
+        self.__album_art_pyramid: Optional[Pyramid] = None
         # Image rescaled for window size.
         self.__album_art: Optional[ImageTk.PhotoImage] = None
         # Queue for passing changes from the album process.
         self.__album_queue: Queue = Queue()
-        # Album name. Used for tracking when the album changes to trigger
-        # downloading new album art.
-        self.__album: str = ""
+        self.__album_process: Optional[Process] = None
+        # Album art identity. Used for tracking when the album changes to
+        # trigger downloading new album art.
+        self.__album_art_key: Optional[Tuple[str, ...]] = None
+
+        idle_subsystems: Tuple[str, ...] = self.IDLE_SUBSYSTEMS
+        if self.__controler.caching:
+            idle_subsystems += self.CACHE_IDLE_SUBSYSTEMS
 
         # Player change detection. Starts a new process for idling while
         # waiting for a player change to occur. This process fills a queue
@@ -102,24 +157,42 @@ class Root(tk.Tk):
         # reads and empties the queue while initiating the album art updates.
         # Check for updates when idle.
         self.after(50, self.idle_player_change)
-        # New connection for idling.
-        self.__album_connection: Connection = Connection(*address)
-        self.__album_controler: Controler = Controler(self.__album_connection, password)
-        # Process to idle independently of the main GUI process.
-        self.__album_process: Process = Process(
-            target=self.__album_controler.idle,
-            args=(self.__album_queue, "player", "playlist"),
-        )
-        self.__album_process.start()
+        if not single_connection:
+            # New connection for idling.
+            self.__album_connection: Connection = Connection(*address)
+            self.__album_controler: Controler = Controler(self.__album_connection, password)
+            # Process to idle independently of the main GUI process.
+            self.__album_process = Process(
+                target=self.__profiler.run_detached,
+                args=(self.__album_controler.idle, self.__album_queue, *idle_subsystems),
+            )
+            self.__album_process.start()
 
         # Initial album art get.
         self.__get_album_art()
 
+        # In single connection mode the main connection idles in between
+        # commands instead, and `idle_player_change` polls it for changes.
+        if single_connection:
+            self.__controler.idle_start(*idle_subsystems)
+
+        # Keep the main connection open between songs, so that getting the
+        # album art on the next song change doesn't start with a reconnect.
+        if self.__keepalive_interval > 0:
+            self.after(int(self.__keepalive_interval * 1000), self.keepalive)
+
         # Handle whole window keybinds.
         # The lambda functions are there just to capture the `event` argument without passing
         # it to the actaul functions since they don't need it.
-        self.bind(config.get("binds", "refresh"), lambda event: self.__get_album_art())
+        self.bind(config.get("binds", "refresh"), lambda event: self.refresh())
+        self.bind(config.get("binds", "reload"), lambda event: self.reload())
         self.bind(config.get("binds", "quit"), lambda event: self.close())
+        self.bind(config.get("binds", "memory"), lambda event: self.report_memory())
+        self.bind(config.get("binds", "profile"), lambda event: self.__profiler.toggle_profile())
+        self.bind(
+            config.get("binds", "trace_memory"),
+            lambda event: self.__profiler.toggle_trace_memory(),
+        )
 
     def close(self):
         """
@@ -128,19 +201,79 @@ class Root(tk.Tk):
         player change monitoring process before exiting.
         """
 
-        self.__album_process.terminate()
+        if self.__album_process is not None:
+            self.__album_process.terminate()
+        self.__clear_album_art()
+        self.__album_art_pyramid = None
+        self.__art_cache.clear()
         self.destroy()
 
+    def report_memory(self):
+        """
+        Log the memory currently used by the album art images.
+        """
+
+        logger.info("Memory: %s", self.__memory_budget.report())
+
+    def keepalive(self):
+        """
+        Pings MPD over the main connection if it has been unused for too long.
+        Reschedules itself for when the connection could time out next.
+        """
+
+        delay = self.__controler.keepalive(self.__keepalive_interval)
+        self.after(max(int(delay * 1000), 1000), self.keepalive)
+
+    def refresh(self):
+        """
+        Update album art if needed. The current song is only requested from
+        MPD again if a change was reported since it was cached. Looks for
+        album art again even if it wasn't found recently, or if a picture
+        embedded in the song is displayed, in case a cover file was added.
+        """
+
+        self.__cover_misses.clear()
+        self.__picture_misses.clear()
+        self.__album_art_key = None
+        with self.__controler.paused():
+            self.__get_album_art()
+
+    def reload(self):
+        """
+        Get the current song from MPD again, bypassing the response cache, and
+        update album art if needed.
+        """
+
+        self.__controler.invalidate()
+        self.refresh()
+
     def idle_player_change(self):
         """
         Called by the album process when a change in the player is detected
         (seek, change song, etc.)
         """
 
-        # Read queue if it's not empty and update album art.
-        if not self.__album_queue.empty():
-            self.__album_queue.get()
-            self.__get_album_art()
+        # Read queue if it's not empty and update album art. In single
+        # connection mode, poll the main connection instead.
+        changed: List[str] = []
+        if self.__album_process is None:
+            changed = self.__controler.idle_poll()
+        while not self.__album_queue.empty():
+            changed += self.__album_queue.get()
+
+        if changed:
+            # Mixer and options changes only invalidate cached responses.
+            self.__controler.invalidate(*changed)
+            if "player" in changed or "playlist" in changed:
+                # Commands are run in one go before idling again.
+                with self.__controler.paused():
+                    self.__get_album_art()
+            if self.__controler.caching:
+                logger.debug(
+                    "Response cache: %d hits, %d misses.",
+                    self.__controler.cache_hits,
+                    self.__controler.cache_misses,
+                )
 
         # Run again in .5 seconds.
         self.after(50, self.idle_player_change)
@@ -152,45 +285,182 @@ class Root(tk.Tk):
         Calls `display_album_art`.
         """
 
+        # Get the playback state and the current song in one round trip.
+        status: Dict[str, Any]
+        current_song_data: Dict[str, Any]
+        status, current_song_data = self.__controler.query_list("status", "currentsong")
+
         # Don't display album art if the current song is stop.
-        playback_state: str = self.__controler.status()["state"]
+        playback_state: str = status.get("state", "")
         if playback_state == "stop":
             logger.debug("Song is stopped, won't display album art.")
+            self.__album_art_key = None
+            self.__album_art_pyramid = None
             self.__clear_album_art()
             return
 
-        # Get album of the currently playing song.
-        current_song_data: Dict[str, Any] = self.__controler.currentsong()
-        if "Album" not in current_song_data:
-            # Song does not have an Album tag, just give up... for now?
-            logger.debug("Current song does not have an album tag, giving up...")
+        # Get the current song. Songs in the same directory share its cover
+        # file, whether they have an Album tag or not. Embedded pictures are
+        # per song, songs of the same album in the same directory are assumed
+        # to share them.
+        if "file" not in current_song_data:
+            logger.debug("No current song, won't display album art.")
+            self.__album_art_key = None
+            self.__album_art_pyramid = None
             self.__clear_album_art()
             return
-        album: str = current_song_data["Album"]
-
-        # Return if it's the same album as the currently loaded album art.
-        if album == self.__album:
+        path: str = current_song_data["file"]
+        directory: str = posixpath.dirname(path)
+        album: Optional[str] = current_song_data.get("Album")
+        cover_key: Tuple[str, ...] = ("cover", directory)
+        picture_key: Tuple[str, ...] = ("picture", directory, album) if album else ("picture", path)
+
+        # Return if it's the same album art as the currently loaded one.
+        if self.__album_art_key in (cover_key, picture_key):
             return
-        self.__album = album
-
-        logger.debug("Getting new album art.")
-
-        # Get album art from MPD.
-        data: Optional[bytes] = self.__controler.albumart()
-        if data is not None:
-            # Open as Pillow image.
-            self.__album_art_original = Image.open(io.BytesIO(data))
-            logger.debug(type(self.__album_art_original))
-            # Resize if image is large.
-            if self.__album_art_original.size > (self.__image_size, self.__image_size):
-                self.__album_art_original = self.__album_art_original.resize(
-                    (self.__image_size, self.__image_size)
-                )
-        else:
-            self.__album_art_original = None
+
+        # Release the displayed album art before the new one is decoded.
+        self.__album_art_key = None
+        self.__album_art_pyramid = None
+        self.__clear_album_art()
+
+        # Get the cover file from the directory. Fall back to a picture
+        # embedded in the song if the directory has no cover file.
+        self.__find_album_art(cover_key, path, embedded=False)
+        if self.__album_art_pyramid is None:
+            self.__find_album_art(picture_key, path, embedded=True)
 
         # Display the new album art.
         self.__display_album_art()
+        logger.debug("Memory: %s", self.__memory_budget.report())
+
+    def __find_album_art(self, key: Tuple[str, ...], path: str, embedded: bool):
+        """
+        Get album art from the cache or download it. Sets `album_art_key` and
+        `album_art_pyramid` if album art was found.
+
+        :arg key: Identity of the album art.
+        :arg path: Path to the current song.
+        :arg embedded: Look for the picture embedded in the song instead of
+            the cover file from its directory.
+        """
+
+        # Cover files are missing per directory, embedded pictures per song.
+        misses: NegativeCache = self.__picture_misses if embedded else self.__cover_misses
+        miss_key: str = path if embedded else posixpath.dirname(path)
+
+        pyramid = self.__art_cache.get(key)
+        if pyramid is not None:
+            logger.debug("Using cached album art.")
+        elif miss_key in misses:
+            logger.debug("No album art in %r recently, not looking again.", miss_key)
+            return
+        else:
+            logger.debug("Getting new album art.")
+            image = self.__download_album_art(path, embedded)
+            if image is None:
+                # Only remember that album art doesn't exist if MPD said so,
+                # not if the download failed.
+                if self.__controler.missing:
+                    misses.add(miss_key)
+                return
+
+            pyramid = Pyramid(image)
+            pyramid.build_in_background()
+            self.__art_cache.put(key, pyramid)
+
+        self.__album_art_key = key
+        self.__album_art_pyramid = pyramid
+
+    def __download_album_art(self, path: str, embedded: bool) -> Optional[Image.Image]:
+        """
+        Downloads and decodes album art.
+
+        :arg path: Path to the current song.
+        :arg embedded: Get the picture embedded in the song instead of the
+            cover file from its directory.
+
+        :return: Decoded album art or `None` if album art does not exist.
+        """
+
+        if self.__progressive:
+            chunks: Iterator[Tuple[bytes, int]]
+            if embedded:
+                chunks = self.__controler.readpicture_chunks(path)
+            else:
+                chunks = self.__controler.albumart_chunks(path)
+            return self.__download_album_art_progressively(chunks)
+
+        data: Optional[bytes]
+        if embedded:
+            data = self.__controler.readpicture(path)
+        else:
+            data = self.__controler.albumart(path)
+
+        return self.__decode_album_art(data) if data is not None else None
+
+    def __download_album_art_progressively(
+        self, chunks: Iterator[Tuple[bytes, int]]
+    ) -> Optional[Image.Image]:
+        """
+        Downloads album art while drawing previews of the part that was
+        decoded so far.
+
+        :arg chunks: Chunks of album art and its total size, as recieved.
+
+        :return: Decoded album art or `None` if album art does not exist.
+        """
+
+        decoder = ProgressiveDecoder()
+        recieved: int = 0
+        size: int = -1
+        last_preview: float = time.monotonic()
+
+        try:
+            for chunk, size in chunks:
+                decoder.feed(chunk)
+                recieved += len(chunk)
+                self.__memory_budget.set("download", decoder.size)
+
+                if recieved < size and time.monotonic() - last_preview >= self.PREVIEW_INTERVAL:
+                    preview = decoder.preview(self.__photo_size())
+                    if preview is not None:
+                        self.__clear_album_art()
+                        self.__draw_album_art(preview)
+                        # Redraw now, the event loop is blocked until the download is done.
+                        self.update_idletasks()
+                    last_preview = time.monotonic()
+
+            # An error occured before all of the album art was recieved.
+            if recieved != size:
+                return None
+
+            image = decoder.close()
+        finally:
+            self.__memory_budget.release("download")
+
+        if image is None:
+            return None
+
+        return fit_album_art(image, self.__image_size, self.__memory_budget)
+
+    def __decode_album_art(self, data: bytes) -> Optional[Image.Image]:
+        """
+        Decode album art downloaded from MPD.
+
+        :arg data: Encoded album art.
+
+        :return: Decoded album art, detached from the encoded data, or `None`
+            if it's invalid.
+        """
+
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.load()
+                return fit_album_art(image, self.__image_size, self.__memory_budget)
+        except (OSError, SyntaxError, ValueError) as error:
+            logger.error("Failed to decode album art: %r.", error)
+            return None
 
     def __display_album_art(self, event: Optional[tk.Event] = None):
         """
@@ -208,15 +478,40 @@ class Root(tk.Tk):
         self.__clear_album_art()
 
         # If no album art is available, leave the canvas blank.
-        if self.__album_art_original is None:
+        if self.__album_art_pyramid is None:
             return
 
+        # Resize from the nearest pyramid level to match canvas size.
+        size = self.__photo_size()
+        self.__draw_album_art(self.__album_art_pyramid.level(size).resize((size, size)))
+
+    def __photo_size(self) -> int:
+        """
+        Get the size the album art should be displayed at.
+
+        :return: Largest square that fits on the canvas and in the memory budget.
+        """
+
         # Get square dimentions (assuming that album art is square).
         size = min(self.__canvas_width, self.__canvas_height)
 
-        # Convert the album art image to a Tk Photo Image and resize
-        # to match canvas size.
-        self.__album_art = ImageTk.PhotoImage(self.__album_art_original.resize((size, size)))
+        # Shrink the displayed image if it doesn't fit in the memory budget.
+        fit = self.__memory_budget.fit_square(PHOTO_IMAGE_BANDS, exclude="photo")
+        if fit is not None and fit < size:
+            size = fit
+
+        return size
+
+    def __draw_album_art(self, image: Image.Image):
+        """
+        Draws album art on the canvas. The canvas should be cleared first.
+
+        :arg image: Album art, already resized to match the canvas.
+        """
+
+        # Convert the album art image to a Tk Photo Image.
+        self.__album_art = ImageTk.PhotoImage(image)
+        self.__memory_budget.set("photo", photo_image_bytes(*image.size))
 
         # Draw album art to canvas.
         self.__canvas.create_image(
@@ -226,5 +521,11 @@ class Root(tk.Tk):
         )
 
     def __clear_album_art(self):
-        self.__album = ""
+        """
+        Clear the canvas and release the displayed photo image.
+        """
+
         self.__canvas.delete("all")
+        # Dropping the last reference deletes the image from Tk.
+        self.__album_art = None
+        self.__memory_budget.release("photo")
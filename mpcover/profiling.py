@@ -0,0 +1,144 @@
+import cProfile
+import os.path
+import pstats
+import time
+import tracemalloc
+from logging import getLogger
+from typing import Any, Callable, Optional
+
+logger = getLogger(__name__)
+
+
+class Profiler:
+    """
+    Runtime toggles for `cProfile` and `tracemalloc`. Results are written to
+    timestamped files when profiling or tracing is stopped.
+
+    Only the main process is covered, the player change monitoring process
+    spends all of its time waiting for a response to `idle`. It's started
+    with `run_detached`, so it doesn't keep profiling or tracing inherited
+    from the main process.
+
+    :arg directory: Directory the results are written to.
+
+    :var profile: Active `cProfile` profile, `None` when not profiling.
+    """
+
+    # Number of frames stored per traced memory allocation.
+    TRACE_FRAMES = 10
+
+    def __init__(self, directory: str):
+        self.directory = os.path.expanduser(directory)
+        self.__profile: Optional[cProfile.Profile] = None
+
+    @property
+    def profiling(self) -> bool:
+        return self.__profile is not None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def toggle_profile(self) -> Optional[str]:
+        """
+        Start profiling if not profiling, otherwise stop and write the profile.
+
+        :return: Path of the written profile or `None` if profiling started.
+        """
+
+        if self.__profile is None:
+            logger.info("Profiling started.")
+            self.__profile = cProfile.Profile()
+            self.__profile.enable()
+            return None
+
+        self.__profile.disable()
+        path = self.__path("profile", "prof")
+        self.__profile.dump_stats(path)
+        self.__profile = None
+        logger.info("Profiling stopped, profile written to %s.", path)
+
+        return path
+
+    def toggle_trace_memory(self) -> Optional[str]:
+        """
+        Start tracing memory allocations if not tracing, otherwise stop and
+        write a snapshot of the traced allocations.
+
+        :return: Path of the written snapshot or `None` if tracing started.
+        """
+
+        if not tracemalloc.is_tracing():
+            logger.info("Memory tracing started.")
+            tracemalloc.start(self.TRACE_FRAMES)
+            return None
+
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        path = self.__path("memory", "snapshot")
+        snapshot.dump(path)
+        logger.info("Memory tracing stopped, snapshot written to %s.", path)
+
+        return path
+
+    def stop(self):
+        """
+        Stop profiling and memory tracing, if active, and write the results.
+        """
+
+        if self.profiling:
+            self.toggle_profile()
+        if self.tracing:
+            self.toggle_trace_memory()
+
+    def run_detached(self, target: Callable[..., Any], *args: Any):
+        """
+        Stop profiling and memory tracing without writing the results, then
+        run the target. Used as the target of forked processes, which
+        inherit the state of the profiler but never stop it.
+
+        :arg target: Callable to run.
+        :arg args: Arguments for the callable.
+        """
+
+        if self.__profile is not None:
+            self.__profile.disable()
+            self.__profile = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+        target(*args)
+
+    def __path(self, kind: str, extension: str) -> str:
+        """
+        Get a timestamped path for a result file.
+
+        :arg kind: Kind of result, part of the file name.
+        :arg extension: File extension.
+
+        :return: Path in the result directory.
+        """
+
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        return os.path.join(self.directory, f"mpcover-{kind}-{timestamp}.{extension}")
+
+
+def print_report(path: str, limit: int = 20):
+    """
+    Print the top hot spots from a profile or the top allocation sites from
+    a memory snapshot, written by `Profiler`.
+
+    :arg path: Path to a `.prof` or a `.snapshot` file.
+    :arg limit: Number of entries to print.
+    """
+
+    if path.endswith(".snapshot"):
+        snapshot = tracemalloc.Snapshot.load(path)
+        statistics = snapshot.statistics("lineno")
+        print(f"Top {limit} of {len(statistics)} allocation sites:")
+        for statistic in statistics[:limit]:
+            print(statistic)
+    else:
+        stats = pstats.Stats(path)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(limit)
@@ -0,0 +1,97 @@
+import io
+import os
+import tracemalloc
+import unittest
+from typing import List
+
+from PIL import Image
+
+from mpcover.gui.art import ArtCache, Pyramid, fit_album_art
+from mpcover.gui.memory import MemoryBudget
+
+
+def current_rss() -> int:
+    """
+    Get the current resident set size of the process in bytes.
+
+    :return: Resident set size or zero if it can't be read.
+    """
+
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+class MemorySoakTest(unittest.TestCase):
+    """
+    Long run of the album art path, without Tk or MPD. Decodes album art,
+    fits it into the memory budget and caches it for thousands of cycles,
+    checking that memory use stays bounded.
+    """
+
+    CYCLES = 2000
+    IMAGE_SIZE = 256
+    BUDGET = 1024 * 1024
+    # Allowed growth after the warm up, for allocator noise.
+    TRACED_GROWTH = 256 * 1024
+    RSS_GROWTH = 16 * 1024 * 1024
+
+    def setUp(self):
+        self.encoded = []
+        for color in ("red", "green", "blue", "white"):
+            with io.BytesIO() as data:
+                Image.new("RGB", (400, 400), color).save(data, "JPEG")
+                self.encoded.append(data.getvalue())
+
+    def cycle(self, index: int, budget: MemoryBudget, cache: ArtCache, cached: List[Pyramid]):
+        with Image.open(io.BytesIO(self.encoded[index % len(self.encoded)])) as image:
+            image.load()
+            art = fit_album_art(image, self.IMAGE_SIZE, budget)
+
+        pyramid = Pyramid(art)
+        pyramid.build_in_background()
+        # Distinct keys, so every cycle evicts an older entry.
+        cache.put(index, pyramid)
+        pyramid.level(self.IMAGE_SIZE // 3)
+
+        # Keys are never reused, so the oldest pyramids are evicted first.
+        # Pixel buffers are freed by refcounting anyway, check that evicted
+        # pyramids are released explicitly.
+        cached.append(pyramid)
+        while len(cached) > len(cache):
+            evicted = cached.pop(0)
+            for level in (evicted.original, evicted.level(1)):
+                with self.assertRaises(ValueError):
+                    level.getpixel((0, 0))
+
+    def test_bounded(self):
+        budget = MemoryBudget(self.BUDGET)
+        cache = ArtCache(budget, 4)
+        cached: List[Pyramid] = []
+
+        tracemalloc.start()
+        try:
+            for index in range(self.CYCLES // 10):
+                self.cycle(index, budget, cache, cached)
+            traced, _ = tracemalloc.get_traced_memory()
+            rss = current_rss()
+
+            for index in range(self.CYCLES // 10, self.CYCLES):
+                self.cycle(index, budget, cache, cached)
+                self.assertLessEqual(budget.total, self.BUDGET)
+                self.assertLessEqual(len(cache), 4)
+
+            self.assertLess(tracemalloc.get_traced_memory()[0] - traced, self.TRACED_GROWTH)
+            if rss:
+                self.assertLess(current_rss() - rss, self.RSS_GROWTH)
+        finally:
+            tracemalloc.stop()
+            cache.clear()
+
+        self.assertEqual(budget.total, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()